@@ -4,5 +4,20 @@ class Settings:
     PROJECT_NAME: str = "AI Resume Screening API"
     API_V1_STR: str = "/api/v1"
     MODEL_NAME: str = "all-MiniLM-L6-v2"
+    # Default weights of the component scores in the overall ATS score
+    SCORE_WEIGHTS: dict = {
+        "semantic": 0.25,
+        "keyword": 0.25,
+        "skills": 0.30,
+        "experience": 0.20
+    }
+    # Share of the grammar score blended into the overall ATS score
+    GRAMMAR_WEIGHT: float = 0.1
+    # Lemma-aware keyword/experience matching via a trimmed spaCy pipeline
+    USE_LEMMA_MATCHING: bool = os.getenv("USE_LEMMA_MATCHING", "false").lower() in ("1", "true", "yes")
+    SPACY_BATCH_SIZE: int = int(os.getenv("SPACY_BATCH_SIZE", "32"))
+    SPACY_N_PROCESS: int = int(os.getenv("SPACY_N_PROCESS", "1"))
+    FEATURE_STORE_PATH: str = os.getenv("FEATURE_STORE_PATH", "data/feature_store.npz")
+    FEATURE_STORE_FLUSH_SECONDS: float = float(os.getenv("FEATURE_STORE_FLUSH_SECONDS", "5"))
 
 settings = Settings()
@@ -1,8 +1,14 @@
 from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+import numpy as np
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, status
 from app.core.config import settings
 from app.services.ml_service import ml_service
-from app.schemas.resume import ResumeAnalysisResponse, ScoreBreakdown, ImprovementTip, MissingKeyword, GrammarIssue
+from app.services.feature_store import feature_store, make_candidate_id, make_job_id
+from app.schemas.resume import (
+    ResumeAnalysisResponse, ScoreBreakdown, ImprovementTip, MissingKeyword, GrammarIssue,
+    RescoreRequest, RescoreResponse, RankedCandidate
+)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -10,9 +16,13 @@ async def lifespan(app: FastAPI):
     print("Loading model...")
     ml_service.load_model(settings.MODEL_NAME)
     print("Model loaded.")
+    feature_store.load()
+    print(f"Feature store loaded ({len(feature_store)} candidates).")
+    feature_store.start_autoflush(settings.FEATURE_STORE_FLUSH_SECONDS)
     yield
     # Clean up resources if needed
     print("Shutting down...")
+    feature_store.close()
 
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -31,10 +41,149 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+def build_analysis(
+    resume_text: str,
+    job_description: str,
+    candidate_id: str,
+    jd_features: Dict,
+    resume_features: Dict,
+    experience_relevance_score: Optional[float] = None
+) -> ResumeAnalysisResponse:
+    """Score one resume against a job description."""
+    # Extract keywords from the shared tokenization
+    jd_keywords_dict = ml_service.extract_keywords(job_description, features=jd_features)
+    resume_keywords_dict = ml_service.extract_keywords(resume_text, features=resume_features)
+
+    jd_keywords = list(jd_keywords_dict.keys())
+    resume_keywords = list(resume_keywords_dict.keys())
+
+    # Calculate TF-IDF weighted keywords
+    jd_tfidf, resume_tfidf = ml_service.calculate_tfidf_keywords(job_description, resume_text)
+
+    # Calculate all scores
+    semantic_score = ml_service.calculate_semantic_similarity(job_description, resume_text)
+    keyword_match_score = ml_service.calculate_keyword_match_score(jd_keywords, resume_keywords)
+    skills_coverage_score = ml_service.calculate_skills_coverage_score(jd_tfidf, resume_keywords)
+    if experience_relevance_score is None:
+        experience_relevance_score = float(
+            ml_service.calculate_experience_relevance_scores(jd_features, [resume_features])[0]
+        )
+
+    # Check grammar and spelling
+    grammar_score, grammar_issues_raw = ml_service.check_grammar(resume_text)
+
+    grammar_issues = [
+        GrammarIssue(
+            message=issue["message"],
+            context=issue["context"],
+            suggestions=issue["suggestions"]
+        )
+        for issue in grammar_issues_raw
+    ]
+
+    # Calculate overall ATS score (now includes grammar)
+    overall_ats_score = ml_service.calculate_overall_ats_score(
+        semantic_score,
+        keyword_match_score,
+        skills_coverage_score,
+        experience_relevance_score
+    )
+    # Slightly adjust for grammar (10% weight by default)
+    overall_ats_score = ml_service.apply_grammar_weight(overall_ats_score, grammar_score)
+
+    # Identify missing keywords with importance
+    jd_set = set(jd_keywords)
+    resume_set = set(resume_keywords)
+
+    missing_keywords_list = []
+    missing_set = jd_set - resume_set
+    for keyword in missing_set:
+        importance = jd_keywords_dict.get(keyword, 1)
+        # Boost importance if keyword has high TF-IDF score
+        if keyword in jd_tfidf:
+            importance = max(importance, int(jd_tfidf[keyword] * 10) + 1)
+        missing_keywords_list.append(MissingKeyword(keyword=keyword, importance=importance))
+
+    # Sort by importance (descending)
+    missing_keywords_list.sort(key=lambda x: x.importance, reverse=True)
+
+    detected_keywords = sorted(list(resume_set))
+
+    # Generate improvement tips
+    missing_kw_names = [mk.keyword for mk in missing_keywords_list]
+    improvement_tips_raw = ml_service.generate_improvement_tips(
+        missing_kw_names,
+        semantic_score,
+        keyword_match_score,
+        experience_relevance_score
+    )
+
+    # Add grammar tip if needed
+    if grammar_score < 80:
+        improvement_tips_raw.insert(0, {
+            "category": "Grammar & Spelling",
+            "tip": f"Found {len(grammar_issues)} grammar/spelling issues. Proofread your resume carefully.",
+            "priority": 1 if grammar_score < 60 else 2
+        })
+
+    improvement_tips = [
+        ImprovementTip(
+            category=tip["category"],
+            tip=tip["tip"],
+            priority=tip["priority"]
+        )
+        for tip in improvement_tips_raw
+    ]
+
+    # Create score breakdown
+    score_breakdown = ScoreBreakdown(
+        keyword_match=round(keyword_match_score, 1),
+        semantic_similarity=round(semantic_score * 100, 1),
+        skills_coverage=round(skills_coverage_score, 1),
+        experience_relevance=round(experience_relevance_score, 1),
+        grammar_score=round(grammar_score, 1)
+    )
+
+    job_id = make_job_id(job_description)
+
+    return ResumeAnalysisResponse(
+        overall_ats_score=overall_ats_score,
+        semantic_score=semantic_score,
+        keyword_match_score=keyword_match_score,
+        skills_coverage_score=skills_coverage_score,
+        experience_relevance_score=experience_relevance_score,
+        grammar_score=grammar_score,
+        score_breakdown=score_breakdown,
+        missing_keywords=missing_keywords_list,
+        detected_keywords=detected_keywords,
+        job_description_keywords=sorted(jd_keywords),
+        improvement_tips=improvement_tips,
+        grammar_issues=grammar_issues,
+        candidate_id=candidate_id,
+        job_id=job_id
+    )
+
+def feature_record(analysis: ResumeAnalysisResponse) -> Dict:
+    """Raw component scores of an analysis, as stored for later re-weighting."""
+    return {
+        "candidate_id": analysis.candidate_id,
+        "job_id": analysis.job_id,
+        "scores": {
+            "semantic": analysis.semantic_score,
+            "keyword": analysis.keyword_match_score,
+            "skills": analysis.skills_coverage_score,
+            "experience": analysis.experience_relevance_score,
+            "grammar": analysis.grammar_score
+        },
+        "detected_keywords": analysis.detected_keywords,
+        "missing_keywords": [mk.keyword for mk in analysis.missing_keywords]
+    }
+
 @app.post(f"{settings.API_V1_STR}/analyze", response_model=ResumeAnalysisResponse)
 async def analyze_resume(
     file: UploadFile = File(...),
-    job_description: str = Form(...)
+    job_description: str = Form(...),
+    candidate_id: Optional[str] = Form(None)
 ):
     if file.content_type != "application/pdf":
         raise HTTPException(
@@ -52,111 +201,112 @@ async def analyze_resume(
                 detail="Could not extract text from the PDF."
             )
 
-        # Extract keywords using standard method
-        jd_keywords_dict = ml_service.extract_keywords(job_description)
-        resume_keywords_dict = ml_service.extract_keywords(resume_text)
+        if settings.USE_LEMMA_MATCHING:
+            jd_lemmas, resume_lemmas = ml_service.lemmatize_texts(
+                [job_description, resume_text],
+                batch_size=settings.SPACY_BATCH_SIZE
+            )
+        else:
+            jd_lemmas = resume_lemmas = None
 
-        jd_keywords = list(jd_keywords_dict.keys())
-        resume_keywords = list(resume_keywords_dict.keys())
+        analysis = build_analysis(
+            resume_text,
+            job_description,
+            # Default to a content hash: filenames like "resume.pdf" collide across candidates
+            candidate_id or make_candidate_id(resume_text),
+            ml_service.extract_text_features(job_description, jd_lemmas),
+            ml_service.extract_text_features(resume_text, resume_lemmas)
+        )
+        # Store raw component scores so the pool can be re-weighted without re-analysis
+        feature_store.upsert(**feature_record(analysis))
+        return analysis
 
-        # Calculate TF-IDF weighted keywords
-        jd_tfidf, resume_tfidf = ml_service.calculate_tfidf_keywords(job_description, resume_text)
+    except HTTPException:
+        raise
+    except Exception as e:
+        # In a real app, log the error
+        print(f"Error processing request: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"An error occurred while processing the resume: {str(e)}"
+        )
 
-        # Calculate all scores
-        semantic_score = ml_service.calculate_semantic_similarity(job_description, resume_text)
-        keyword_match_score = ml_service.calculate_keyword_match_score(jd_keywords, resume_keywords)
-        skills_coverage_score = ml_service.calculate_skills_coverage_score(jd_tfidf, resume_keywords)
-        experience_relevance_score = ml_service.calculate_experience_relevance_score(job_description, resume_text)
-        
-        # Check grammar and spelling
-        grammar_score, grammar_issues_raw = ml_service.check_grammar(resume_text)
-        
-        grammar_issues = [
-            GrammarIssue(
-                message=issue["message"],
-                context=issue["context"],
-                suggestions=issue["suggestions"]
+@app.post(f"{settings.API_V1_STR}/analyze/batch", response_model=List[ResumeAnalysisResponse])
+async def analyze_resumes_batch(
+    files: List[UploadFile] = File(...),
+    job_description: str = Form(...),
+    candidate_ids: Optional[List[str]] = Form(None)
+):
+    if candidate_ids is not None:
+        if len(candidate_ids) != len(files):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="candidate_ids must contain one id per uploaded file."
+            )
+        if len(set(candidate_ids)) != len(candidate_ids):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="candidate_ids must be unique within a batch."
             )
-            for issue in grammar_issues_raw
-        ]
-        
-        # Calculate overall ATS score (now includes grammar)
-        overall_ats_score = ml_service.calculate_overall_ats_score(
-            semantic_score,
-            keyword_match_score,
-            skills_coverage_score,
-            experience_relevance_score
-        )
-        # Slightly adjust for grammar (10% weight)
-        overall_ats_score = round(overall_ats_score * 0.9 + grammar_score * 0.1, 1)
 
-        # Identify missing keywords with importance
-        jd_set = set(jd_keywords)
-        resume_set = set(resume_keywords)
-        
-        missing_keywords_list = []
-        missing_set = jd_set - resume_set
-        for keyword in missing_set:
-            importance = jd_keywords_dict.get(keyword, 1)
-            # Boost importance if keyword has high TF-IDF score
-            if keyword in jd_tfidf:
-                importance = max(importance, int(jd_tfidf[keyword] * 10) + 1)
-            missing_keywords_list.append(MissingKeyword(keyword=keyword, importance=importance))
-        
-        # Sort by importance (descending)
-        missing_keywords_list.sort(key=lambda x: x.importance, reverse=True)
-
-        detected_keywords = sorted(list(resume_set))
-
-        # Generate improvement tips
-        missing_kw_names = [mk.keyword for mk in missing_keywords_list]
-        improvement_tips_raw = ml_service.generate_improvement_tips(
-            missing_kw_names,
-            semantic_score,
-            keyword_match_score,
-            experience_relevance_score
-        )
-        
-        # Add grammar tip if needed
-        if grammar_score < 80:
-            improvement_tips_raw.insert(0, {
-                "category": "Grammar & Spelling",
-                "tip": f"Found {len(grammar_issues)} grammar/spelling issues. Proofread your resume carefully.",
-                "priority": 1 if grammar_score < 60 else 2
-            })
-        
-        improvement_tips = [
-            ImprovementTip(
-                category=tip["category"],
-                tip=tip["tip"],
-                priority=tip["priority"]
+    for file in files:
+        if file.content_type != "application/pdf":
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid file type for {file.filename}. Only PDF files are supported."
             )
-            for tip in improvement_tips_raw
-        ]
 
-        # Create score breakdown
-        score_breakdown = ScoreBreakdown(
-            keyword_match=round(keyword_match_score, 1),
-            semantic_similarity=round(semantic_score * 100, 1),
-            skills_coverage=round(skills_coverage_score, 1),
-            experience_relevance=round(experience_relevance_score, 1),
-            grammar_score=round(grammar_score, 1)
-        )
+    try:
+        resume_texts = []
+        for file in files:
+            resume_text = ml_service.extract_text_from_pdf(await file.read())
+            if not resume_text:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Could not extract text from {file.filename}."
+                )
+            resume_texts.append(resume_text)
 
-        return ResumeAnalysisResponse(
-            overall_ats_score=overall_ats_score,
-            semantic_score=semantic_score,
-            keyword_match_score=keyword_match_score,
-            skills_coverage_score=skills_coverage_score,
-            experience_relevance_score=experience_relevance_score,
-            grammar_score=grammar_score,
-            score_breakdown=score_breakdown,
-            missing_keywords=missing_keywords_list,
-            detected_keywords=detected_keywords,
-            job_description_keywords=sorted(jd_keywords),
-            improvement_tips=improvement_tips,
-            grammar_issues=grammar_issues
-        )
+        if candidate_ids is None:
+            candidate_ids = [make_candidate_id(resume_text) for resume_text in resume_texts]
+            if len(set(candidate_ids)) != len(candidate_ids):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="The batch contains duplicate resumes."
+                )
+
+        # Lemmatize the JD and all resumes in one batched pass through the pipeline
+        if settings.USE_LEMMA_MATCHING:
+            lemmas = ml_service.lemmatize_texts(
+                [job_description] + resume_texts,
+                batch_size=settings.SPACY_BATCH_SIZE,
+                n_process=settings.SPACY_N_PROCESS
+            )
+            jd_lemmas, resume_lemmas = lemmas[0], lemmas[1:]
+        else:
+            jd_lemmas, resume_lemmas = None, [None] * len(resume_texts)
+
+        # Tokenize every text once and score experience relevance for the whole batch
+        jd_features = ml_service.extract_text_features(job_description, jd_lemmas)
+        resume_features = [
+            ml_service.extract_text_features(resume_text, lemmas)
+            for resume_text, lemmas in zip(resume_texts, resume_lemmas)
+        ]
+        experience_scores = ml_service.calculate_experience_relevance_scores(jd_features, resume_features)
+
+        analyses = [
+            build_analysis(
+                resume_text, job_description, candidate_id,
+                jd_features, features, float(experience_score)
+            )
+            for candidate_id, resume_text, features, experience_score
+            in zip(candidate_ids, resume_texts, resume_features, experience_scores)
+        ]
+        # Write the whole batch to the feature store at once
+        feature_store.upsert_many([feature_record(analysis) for analysis in analyses])
+        return analyses
 
     except HTTPException:
         raise
@@ -167,9 +317,59 @@ async def analyze_resume(
         traceback.print_exc()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"An error occurred while processing the resume: {str(e)}"
+            detail=f"An error occurred while processing the resumes: {str(e)}"
         )
 
+@app.post(f"{settings.API_V1_STR}/rescore", response_model=RescoreResponse)
+async def rescore_candidates(request: RescoreRequest):
+    weights = request.weights
+    component_weights = {
+        "semantic": weights.semantic,
+        "keyword": weights.keyword,
+        "skills": weights.skills,
+        "experience": weights.experience
+    }
+    total_weight = sum(component_weights.values())
+    if total_weight <= 0:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one of the semantic, keyword, skills or experience weights must be positive."
+        )
+    # Normalize so the overall score stays on a 0-100 scale
+    component_weights = {k: v / total_weight for k, v in component_weights.items()}
+
+    columns = feature_store.snapshot(request.job_id)
+    scores = columns["scores"]
+    overall = ml_service.calculate_overall_ats_scores(scores, component_weights, weights.grammar)
+
+    # Only the top_k rows are sorted and turned into response models
+    top_k = min(request.top_k, len(overall))
+    if top_k < len(overall):
+        order = np.argpartition(-overall, top_k - 1)[:top_k]
+    else:
+        order = np.arange(len(overall))
+    order = order[np.argsort(-overall[order], kind="stable")]
+
+    candidates = [
+        RankedCandidate(
+            rank=rank,
+            candidate_id=columns["candidate_ids"][row],
+            job_id=columns["job_ids"][row],
+            overall_ats_score=float(overall[row]),
+            score_breakdown=ScoreBreakdown(
+                keyword_match=round(float(scores[row, 1]), 1),
+                semantic_similarity=round(float(scores[row, 0]) * 100, 1),
+                skills_coverage=round(float(scores[row, 2]), 1),
+                experience_relevance=round(float(scores[row, 3]), 1),
+                grammar_score=round(float(scores[row, 4]), 1)
+            ),
+            missing_keywords=columns["missing_keywords"][row]
+        )
+        for rank, row in enumerate(order, start=1)
+    ]
+
+    return RescoreResponse(total_candidates=len(overall), candidates=candidates)
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the AI Resume Screening API"}
@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
+from app.core.config import settings
 
 class MissingKeyword(BaseModel):
     keyword: str
@@ -35,3 +36,29 @@ class ResumeAnalysisResponse(BaseModel):
     job_description_keywords: List[str]
     improvement_tips: List[ImprovementTip]
     grammar_issues: List[GrammarIssue]
+    candidate_id: Optional[str] = None
+    job_id: Optional[str] = None
+
+class RescoreWeights(BaseModel):
+    semantic: float = Field(settings.SCORE_WEIGHTS["semantic"], ge=0)
+    keyword: float = Field(settings.SCORE_WEIGHTS["keyword"], ge=0)
+    skills: float = Field(settings.SCORE_WEIGHTS["skills"], ge=0)
+    experience: float = Field(settings.SCORE_WEIGHTS["experience"], ge=0)
+    grammar: float = Field(settings.GRAMMAR_WEIGHT, ge=0, le=1)  # share blended into the overall score
+
+class RescoreRequest(BaseModel):
+    weights: RescoreWeights = RescoreWeights()
+    job_id: str  # rank only candidates analyzed against this JD
+    top_k: int = Field(50, ge=1, le=1000)
+
+class RankedCandidate(BaseModel):
+    rank: int
+    candidate_id: str
+    job_id: str
+    overall_ats_score: float
+    score_breakdown: ScoreBreakdown
+    missing_keywords: List[str]
+
+class RescoreResponse(BaseModel):
+    total_candidates: int
+    candidates: List[RankedCandidate]
@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+
+def _text_digest(text: str) -> str:
+    normalized = " ".join(text.lower().split())
+    return hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:12]
+
+
+def make_job_id(job_description: str) -> str:
+    """Derive a stable identifier for a job description from its normalized text."""
+    return _text_digest(job_description)
+
+
+def make_candidate_id(resume_text: str) -> str:
+    """Derive a stable identifier for a resume from its extracted text."""
+    return "resume-" + _text_digest(resume_text)
+
+
+class FeatureStore:
+    """Columnar store of raw component scores per candidate / job description pair.
+
+    Scores are kept in a single float matrix (one column per component) so that
+    re-weighting the whole pool is one vectorized pass. Writes only mark the store
+    dirty; ``flush`` persists it to a ``.npz`` file, either from the background
+    flusher started with ``start_autoflush`` or at shutdown.
+    """
+
+    COMPONENTS = ("semantic", "keyword", "skills", "experience", "grammar")
+
+    def __init__(self, path: Optional[str] = None, initial_capacity: int = 64):
+        self.path = path
+        self._lock = threading.Lock()
+        self._size = 0
+        self._scores = np.zeros((initial_capacity, len(self.COMPONENTS)), dtype=np.float64)
+        self._candidate_ids = np.empty(initial_capacity, dtype=object)
+        self._job_ids = np.empty(initial_capacity, dtype=object)
+        self._detected_keywords = np.empty(initial_capacity, dtype=object)
+        self._missing_keywords = np.empty(initial_capacity, dtype=object)
+        self._index: Dict[Tuple[str, str], int] = {}
+        self._dirty = False
+        # Serializes flushes so concurrent writers never race on the temp file
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._flush_thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _ensure_capacity(self, required: int):
+        capacity = self._scores.shape[0]
+        if required <= capacity:
+            return
+        new_capacity = max(required, capacity * 2)
+        scores = np.zeros((new_capacity, len(self.COMPONENTS)), dtype=np.float64)
+        scores[:self._size] = self._scores[:self._size]
+        self._scores = scores
+        for name in ("_candidate_ids", "_job_ids", "_detected_keywords", "_missing_keywords"):
+            column = np.empty(new_capacity, dtype=object)
+            column[:self._size] = getattr(self, name)[:self._size]
+            setattr(self, name, column)
+
+    def upsert(self, candidate_id: str, job_id: str, scores: Dict[str, float],
+               detected_keywords: List[str], missing_keywords: List[str]):
+        """Insert or replace the features of a candidate / job description pair."""
+        self.upsert_many([{
+            "candidate_id": candidate_id,
+            "job_id": job_id,
+            "scores": scores,
+            "detected_keywords": detected_keywords,
+            "missing_keywords": missing_keywords,
+        }])
+
+    def upsert_many(self, records: List[Dict]):
+        """Insert or replace several records (same keys as ``upsert``) under one lock."""
+        with self._lock:
+            self._ensure_capacity(self._size + len(records))
+            for record in records:
+                key = (record["candidate_id"], record["job_id"])
+                row = self._index.get(key)
+                if row is None:
+                    row = self._size
+                    self._size += 1
+                    self._index[key] = row
+
+                self._scores[row] = [record["scores"][component] for component in self.COMPONENTS]
+                self._candidate_ids[row] = record["candidate_id"]
+                self._job_ids[row] = record["job_id"]
+                self._detected_keywords[row] = list(record["detected_keywords"])
+                self._missing_keywords[row] = list(record["missing_keywords"])
+            self._dirty = True
+
+    def snapshot(self, job_id: Optional[str] = None) -> Dict[str, np.ndarray]:
+        """Return a copy of the stored columns, optionally restricted to one job description."""
+        with self._lock:
+            n = self._size
+            if job_id is None:
+                rows = np.arange(n)
+            else:
+                rows = np.flatnonzero(self._job_ids[:n] == job_id)
+
+            return {
+                "scores": self._scores[rows],
+                "candidate_ids": self._candidate_ids[rows],
+                "job_ids": self._job_ids[rows],
+                "detected_keywords": self._detected_keywords[rows],
+                "missing_keywords": self._missing_keywords[rows],
+            }
+
+    def flush(self):
+        """Persist the store if it changed since the last flush."""
+        if not self.path:
+            return
+
+        with self._flush_lock:
+            # Copy the columns under the lock, then write without blocking writers
+            with self._lock:
+                if not self._dirty:
+                    return
+                n = self._size
+                scores = self._scores[:n].copy()
+                candidate_ids = self._candidate_ids[:n].astype(str)
+                job_ids = self._job_ids[:n].astype(str)
+                detected = self._detected_keywords[:n].copy()
+                missing = self._missing_keywords[:n].copy()
+                self._dirty = False
+
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    np.savez(
+                        f,
+                        scores=scores,
+                        candidate_ids=candidate_ids,
+                        job_ids=job_ids,
+                        detected_keywords=np.array([json.dumps(k) for k in detected], dtype=str),
+                        missing_keywords=np.array([json.dumps(k) for k in missing], dtype=str),
+                    )
+                os.replace(tmp_path, self.path)
+            except Exception:
+                with self._lock:
+                    self._dirty = True
+                raise
+
+    def start_autoflush(self, interval: float):
+        """Flush the store every ``interval`` seconds from a background thread."""
+        if interval <= 0:
+            raise ValueError(f"Flush interval must be positive, got {interval}.")
+        if not self.path or self._flush_thread is not None:
+            return
+
+        def run():
+            while not self._stop_event.wait(interval):
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"Feature store flush failed: {e}")
+
+        self._stop_event.clear()
+        self._flush_thread = threading.Thread(target=run, name="feature-store-flush", daemon=True)
+        self._flush_thread.start()
+
+    def close(self):
+        """Stop the background flusher and write any pending changes."""
+        if self._flush_thread is not None:
+            self._stop_event.set()
+            self._flush_thread.join()
+            self._flush_thread = None
+        self.flush()
+
+    def load(self):
+        """Load previously persisted features, if the store file exists."""
+        if not self.path or not os.path.exists(self.path):
+            return
+
+        with np.load(self.path, allow_pickle=False) as data:
+            scores = data["scores"]
+            candidate_ids = data["candidate_ids"].tolist()
+            job_ids = data["job_ids"].tolist()
+            detected = [json.loads(k) for k in data["detected_keywords"].tolist()]
+            missing = [json.loads(k) for k in data["missing_keywords"].tolist()]
+
+        with self._lock:
+            n = len(candidate_ids)
+            self._size = 0
+            self._index = {}
+            self._ensure_capacity(n)
+            self._scores[:n] = scores
+            for row in range(n):
+                self._candidate_ids[row] = candidate_ids[row]
+                self._job_ids[row] = job_ids[row]
+                self._detected_keywords[row] = detected[row]
+                self._missing_keywords[row] = missing[row]
+                self._index[(candidate_ids[row], job_ids[row])] = row
+            self._size = n
+            self._dirty = False
+
+
+feature_store = FeatureStore(settings.FEATURE_STORE_PATH)
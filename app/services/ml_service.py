@@ -1,11 +1,14 @@
 import re
-from typing import List, Dict, Tuple
+from collections import Counter
+from typing import List, Dict, Optional, Tuple
 from sentence_transformers import SentenceTransformer, util
 import PyPDF2
 from io import BytesIO
 from sklearn.feature_extraction.text import TfidfVectorizer
 import numpy as np
 
+from app.core.config import settings
+
 # Try to import pdfplumber for better PDF parsing
 try:
     import pdfplumber
@@ -32,6 +35,13 @@ class MLService:
     def __init__(self):
         self.model = None
         self.nlp = None
+        # Token n-gram keys of the skill/experience patterns (built on first use)
+        self._pattern_keys = None
+        self._max_ngram = 1
+        # Pattern tokens containing a dot (node.js, vue.js, ...), kept whole when tokenizing
+        self._dotted_terms = set()
+        # Lemmatized forms of the same patterns (built once per loaded pipeline)
+        self._lemma_patterns = None
         
         # Comprehensive skill list with categories
         self.common_tech_skills = [
@@ -106,6 +116,15 @@ class MLService:
             "object oriented programming": ["oop", "object oriented"],
         }
         
+        # Skills/synonyms that are also common English words; their lemmas collide with
+        # unrelated verbs or nouns ("went" -> go, "excelled" -> excel), so they only match
+        # on their surface form
+        self.surface_only_skills = {
+            "go", "r", "express", "spark", "swift", "rust", "chef", "puppet", "master",
+            "windows", "less", "excel", "slack", "oracle", "node", "rest", "coding",
+            "programming", "testing", "debugging", "networking", "mentoring"
+        }
+        
         # Experience keywords for relevance scoring
         self.experience_keywords = [
             "senior", "junior", "lead", "principal", "staff", "manager", "director",
@@ -113,6 +132,12 @@ class MLService:
             "consultant", "intern", "associate", "entry level", "mid level", "experienced"
         ]
         
+        # Experience keywords/action verbs whose lemmas collide with other terms
+        # ("led" -> lead, "experienced" -> experience), so they only match on their surface form
+        self.surface_only_experience_terms = {
+            "lead", "led", "head", "staff", "associate", "experienced"
+        }
+        
         # Action verbs for resume quality
         self.action_verbs = [
             "developed", "implemented", "designed", "created", "built", "led", "managed",
@@ -121,21 +146,35 @@ class MLService:
             "streamlined", "automated", "resolved", "analyzed", "delivered", "achieved"
         ]
         
+        # Default weights of the overall ATS score (shared with the rescore API defaults)
+        self.score_weights = dict(settings.SCORE_WEIGHTS)
+        self.grammar_weight = settings.GRAMMAR_WEIGHT
+        
         # Grammar checker (lazy loaded)
         self.grammar_tool = None
 
     def load_model(self, model_name: str):
-        """Loads the SentenceTransformer model and spaCy if available."""
+        """Loads the SentenceTransformer model, and spaCy if lemma matching is enabled."""
         self.model = SentenceTransformer(model_name)
+        if settings.USE_LEMMA_MATCHING:
+            self.load_nlp()
+
+    def load_nlp(self):
+        """Loads a trimmed spaCy pipeline used only for lemmatization."""
+        if not HAS_SPACY:
+            return
         
-        if HAS_SPACY:
-            try:
-                self.nlp = spacy.load("en_core_web_sm")
-            except OSError:
-                # Model not installed, try to download
-                import subprocess
-                subprocess.run(["python", "-m", "spacy", "download", "en_core_web_sm"])
-                self.nlp = spacy.load("en_core_web_sm")
+        # The lemmatizer only needs the tagger/attribute_ruler; skip the parser and NER
+        excluded = ["parser", "ner"]
+        try:
+            self.nlp = spacy.load("en_core_web_sm", exclude=excluded)
+        except OSError:
+            # Model not installed, try to download
+            import subprocess
+            subprocess.run(["python", "-m", "spacy", "download", "en_core_web_sm"])
+            self.nlp = spacy.load("en_core_web_sm", exclude=excluded)
+        # Pattern lemmas depend on the pipeline; rebuild them on first lemma use
+        self._lemma_patterns = None
 
     def preprocess_text(self, text: str) -> str:
         """Cleans and preprocesses the text while preserving important tokens."""
@@ -153,12 +192,140 @@ class MLService:
 
     def lemmatize_text(self, text: str) -> str:
         """Lemmatize text using spaCy if available."""
+        return self.lemmatize_texts([text])[0]
+
+    def lemmatize_texts(self, texts: List[str], batch_size: int = 32,
+                        n_process: int = 1) -> List[str]:
+        """Lemmatize preprocessed texts in batches through ``nlp.pipe``.
+        
+        Every token is kept (stop words included) so multi-word skills remain contiguous.
+        Returns the preprocessed texts unchanged if spaCy is unavailable.
+        """
+        processed = [self.preprocess_text(text) for text in texts]
         if not HAS_SPACY or self.nlp is None:
-            return text
+            return processed
         
-        doc = self.nlp(text)
-        lemmatized = " ".join([token.lemma_ for token in doc if not token.is_stop])
-        return lemmatized
+        docs = self.nlp.pipe(processed, batch_size=batch_size, n_process=n_process)
+        return [" ".join(token.lemma_.lower() for token in doc) for doc in docs]
+
+    def _split_tokens(self, processed_text: str) -> List[str]:
+        """Split preprocessed text on whitespace/punctuation, keeping internal dots, + and #."""
+        return re.findall(r'[a-z0-9\+\#](?:[a-z0-9\.\+\#]*[a-z0-9\+\#])?', processed_text)
+
+    def tokenize(self, processed_text: str) -> List[str]:
+        """Split preprocessed text into word tokens, keeping symbols like c++, c# and node.js intact.
+        
+        Dotted tokens that are not known patterns are split on the dots, since PDF
+        extraction often joins words with a period ("aws.docker").
+        """
+        self._get_pattern_keys()
+        tokens = []
+        for token in self._split_tokens(processed_text):
+            if "." in token and token not in self._dotted_terms:
+                tokens.extend(piece for piece in token.split(".") if piece)
+            else:
+                tokens.append(token)
+        return tokens
+
+    def _all_patterns(self) -> List[str]:
+        """Every skill, synonym, experience keyword and action verb that is matched on text."""
+        patterns = set(self.common_tech_skills) | set(self.experience_keywords) | set(self.action_verbs)
+        for synonyms in self.skill_synonyms.values():
+            patterns.update(synonyms)
+        return sorted(patterns)
+
+    def _get_pattern_keys(self) -> Dict[str, str]:
+        """Map every pattern to its space-joined token n-gram."""
+        if self._pattern_keys is None:
+            self._pattern_keys = {
+                pattern: " ".join(self._split_tokens(self.preprocess_text(pattern)))
+                for pattern in self._all_patterns()
+            }
+            self._dotted_terms.update(self._dotted_tokens(self._pattern_keys.values()))
+            self._max_ngram = max(self._max_ngram, max(len(k.split()) for k in self._pattern_keys.values()))
+        return self._pattern_keys
+
+    def _get_lemma_patterns(self) -> Dict[str, str]:
+        """Map every pattern to the token n-gram of its lemma form."""
+        if self._lemma_patterns is None:
+            patterns = self._all_patterns()
+            lemmas = self.lemmatize_texts(patterns, batch_size=256)
+            self._lemma_patterns = {
+                pattern: " ".join(self._split_tokens(lemma)) for pattern, lemma in zip(patterns, lemmas)
+            }
+            self._dotted_terms.update(self._dotted_tokens(self._lemma_patterns.values()))
+            self._max_ngram = max(self._max_ngram, max(len(k.split()) for k in self._lemma_patterns.values()))
+        return self._lemma_patterns
+
+    def _dotted_tokens(self, keys) -> set:
+        """Tokens containing a dot within the given pattern keys."""
+        return {token for key in keys for token in key.split() if "." in token}
+
+    def _count_ngrams(self, tokens: List[str]) -> Counter:
+        """Count all token n-grams up to the longest pattern length."""
+        counts = Counter(tokens)
+        for n in range(2, self._max_ngram + 1):
+            counts.update(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return counts
+
+    def extract_text_features(self, text: str, lemmatized_text: Optional[str] = None) -> Dict[str, Optional[Counter]]:
+        """Tokenize a text once into n-gram counts shared by keyword and experience matching.
+        
+        If ``lemmatized_text`` (from ``lemmatize_texts``) is given, its n-grams are counted
+        too so that inflected forms can be matched.
+        """
+        self._get_pattern_keys()
+        features = {
+            "counts": self._count_ngrams(self.tokenize(self.preprocess_text(text))),
+            "lemma_counts": None
+        }
+        if lemmatized_text is not None:
+            self._get_lemma_patterns()
+            features["lemma_counts"] = self._count_ngrams(self.tokenize(lemmatized_text))
+        return features
+
+    def _term_columns(self, terms: List[str], lemma: bool = False) -> Dict[str, List[int]]:
+        """Map the n-gram keys of terms to their column indices.
+        
+        Surface keys also map their plain plural ("engineers", "senior developers").
+        Lemma keys skip the terms in ``surface_only_experience_terms``.
+        """
+        columns = {}
+        if lemma:
+            lemma_keys = self._get_lemma_patterns()
+            for col, term in enumerate(terms):
+                if term not in self.surface_only_experience_terms and lemma_keys.get(term):
+                    columns.setdefault(lemma_keys[term], []).append(col)
+        else:
+            pattern_keys = self._get_pattern_keys()
+            for col, term in enumerate(terms):
+                for key in (pattern_keys[term], pattern_keys[term] + "s"):
+                    columns.setdefault(key, []).append(col)
+        return columns
+
+    def _presence_matrix(self, features_list: List[Dict[str, Optional[Counter]]],
+                         terms: List[str]) -> np.ndarray:
+        """Boolean matrix (texts x terms) of which terms occur as whole tokens/n-grams.
+        
+        Each text's n-gram keys are intersected with the term keys as a set, and all
+        hits are scattered into the matrix with a single NumPy assignment.
+        """
+        surface_columns = self._term_columns(terms)
+        lemma_columns = None
+        rows, cols = [], []
+        for row, features in enumerate(features_list):
+            hits = [surface_columns[key] for key in features["counts"].keys() & surface_columns.keys()]
+            if features["lemma_counts"] is not None:
+                if lemma_columns is None:
+                    lemma_columns = self._term_columns(terms, lemma=True)
+                hits.extend(lemma_columns[key] for key in features["lemma_counts"].keys() & lemma_columns.keys())
+            for hit_cols in hits:
+                rows.extend([row] * len(hit_cols))
+                cols.extend(hit_cols)
+        
+        presence = np.zeros((len(features_list), len(terms)), dtype=bool)
+        presence[np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)] = True
+        return presence
 
     def normalize_skill(self, skill: str) -> str:
         """Normalize a skill to its canonical form using synonyms."""
@@ -173,10 +340,16 @@ class MLService:
         
         return skill_lower
 
-    def extract_keywords(self, text: str) -> Dict[str, int]:
-        """Extracts common tech skills from the text and their frequencies."""
-        processed_text = self.preprocess_text(text)
-        found_skills = {}
+    def extract_keywords(self, text: str, lemmatized_text: Optional[str] = None,
+                         features: Optional[Dict[str, Optional[Counter]]] = None) -> Dict[str, int]:
+        """Extracts common tech skills from the text and their frequencies.
+        
+        If ``lemmatized_text`` (from ``lemmatize_texts``) is given, skills are also matched
+        on lemma forms, so inflections such as plurals are found as well. Pass ``features``
+        from ``extract_text_features`` to reuse an existing tokenization.
+        """
+        if features is None:
+            features = self.extract_text_features(text, lemmatized_text)
 
         # Sort by length (longest first) to match multi-word skills first
         sorted_skill_list = sorted(self.common_tech_skills, key=len, reverse=True)
@@ -189,18 +362,36 @@ class MLService:
                 for synonym in self.skill_synonyms[skill]:
                     all_patterns.append((synonym, skill))
 
-        for pattern, canonical_skill in all_patterns:
-            if len(pattern.split()) > 1:
-                count = processed_text.count(pattern)
-                if count > 0:
-                    normalized = self.normalize_skill(canonical_skill)
-                    found_skills[normalized] = found_skills.get(normalized, 0) + count
-            else:
-                regex_pattern = r'\b' + re.escape(pattern) + r'\b'
-                matches = re.findall(regex_pattern, processed_text)
-                if matches:
-                    normalized = self.normalize_skill(canonical_skill)
-                    found_skills[normalized] = found_skills.get(normalized, 0) + len(matches)
+        found_skills = self._match_patterns(features["counts"], self._get_pattern_keys(), all_patterns)
+        
+        if features["lemma_counts"] is not None:
+            lemma_skills = self._match_patterns(
+                features["lemma_counts"],
+                self._get_lemma_patterns(),
+                [(pattern, skill) for pattern, skill in all_patterns
+                 if pattern not in self.surface_only_skills]
+            )
+            # A surface match is also a lemma match; keep the higher count per skill
+            for skill, count in lemma_skills.items():
+                found_skills[skill] = max(found_skills.get(skill, 0), count)
+        
+        return found_skills
+
+    def _match_patterns(self, ngram_counts: Counter, pattern_keys: Dict[str, str],
+                        patterns: List[Tuple[str, str]]) -> Dict[str, int]:
+        """Count whole-token occurrences of (pattern, canonical skill) pairs."""
+        found_skills = {}
+        seen = set()
+        for pattern, canonical_skill in patterns:
+            key = pattern_keys.get(pattern, "")
+            # Synonyms like "cplusplus" normalize to the same n-gram as their skill
+            if (key, canonical_skill) in seen:
+                continue
+            seen.add((key, canonical_skill))
+            count = ngram_counts[key]
+            if count > 0:
+                normalized = self.normalize_skill(canonical_skill)
+                found_skills[normalized] = found_skills.get(normalized, 0) + count
         
         return found_skills
 
@@ -297,44 +488,55 @@ class MLService:
         
         return (matched_weight / total_weight) * 100
 
-    def calculate_experience_relevance_score(self, jd_text: str, resume_text: str) -> float:
-        """Calculate experience relevance based on job titles and levels."""
-        jd_processed = self.preprocess_text(jd_text)
-        resume_processed = self.preprocess_text(resume_text)
-        
+    def calculate_experience_relevance_score(self, jd_text: str, resume_text: str,
+                                             jd_lemmas: Optional[str] = None,
+                                             resume_lemmas: Optional[str] = None) -> float:
+        """Calculate experience relevance based on job titles and levels.
+        
+        Pass the lemmatized texts to also match inflected forms (e.g. "deploying").
+        """
+        jd_features = self.extract_text_features(jd_text, jd_lemmas)
+        resume_features = self.extract_text_features(resume_text, resume_lemmas)
+        return float(self.calculate_experience_relevance_scores(jd_features, [resume_features])[0])
+
+    def calculate_experience_relevance_scores(self, jd_features: Dict[str, Optional[Counter]],
+                                              resume_features: List[Dict[str, Optional[Counter]]]) -> np.ndarray:
+        """Experience relevance for many resumes against one JD.
+        
+        Takes the output of ``extract_text_features``; terms only match as whole tokens,
+        so "lead" does not match inside "leadership". Term presence is gathered per resume
+        with set intersections (linear in the number of resumes); the scoring is then one
+        NumPy operation over the whole batch.
+        """
         # Find experience keywords in JD
-        jd_exp_keywords = []
-        for keyword in self.experience_keywords:
-            if keyword in jd_processed:
-                jd_exp_keywords.append(keyword)
+        jd_mask = self._presence_matrix([jd_features], self.experience_keywords)[0]
         
-        if not jd_exp_keywords:
+        if not jd_mask.any():
             # If no specific experience level mentioned, give neutral score
-            return 70.0
+            return np.full(len(resume_features), 70.0)
+        
+        # One row per resume: experience keyword presence followed by action verb presence
+        terms = self.experience_keywords + self.action_verbs
+        presence = self._presence_matrix(resume_features, terms)
+        
+        experience_presence = presence[:, :len(self.experience_keywords)]
+        action_verb_presence = presence[:, len(self.experience_keywords):]
         
-        # Check how many are in resume
-        matches = 0
-        for keyword in jd_exp_keywords:
-            if keyword in resume_processed:
-                matches += 1
+        # Check how many JD experience keywords are in each resume
+        matches = experience_presence[:, jd_mask].sum(axis=1)
         
         # Also check for action verbs in resume (quality indicator)
-        action_verb_count = sum(1 for verb in self.action_verbs if verb in resume_processed)
-        action_verb_bonus = min(action_verb_count * 2, 20)  # Max 20 points bonus
+        action_verb_bonus = np.minimum(action_verb_presence.sum(axis=1) * 2, 20)  # Max 20 points bonus
         
-        base_score = (matches / len(jd_exp_keywords)) * 80 if jd_exp_keywords else 60
+        base_score = (matches / jd_mask.sum()) * 80
         
-        return min(base_score + action_verb_bonus, 100.0)
+        return np.minimum(base_score + action_verb_bonus, 100.0)
 
     def calculate_overall_ats_score(self, semantic: float, keyword: float, 
-                                     skills: float, experience: float) -> float:
+                                     skills: float, experience: float,
+                                     weights: Optional[Dict[str, float]] = None) -> float:
         """Calculate weighted overall ATS score."""
-        weights = {
-            'semantic': 0.25,
-            'keyword': 0.25,
-            'skills': 0.30,
-            'experience': 0.20
-        }
+        weights = weights or self.score_weights
         
         overall = (
             semantic * 100 * weights['semantic'] +
@@ -345,6 +547,34 @@ class MLService:
         
         return min(round(overall, 1), 100.0)
 
+    def apply_grammar_weight(self, overall_score: float, grammar_score: float,
+                             grammar_weight: Optional[float] = None) -> float:
+        """Blend the grammar score into an overall ATS score."""
+        if grammar_weight is None:
+            grammar_weight = self.grammar_weight
+        return round(overall_score * (1 - grammar_weight) + grammar_score * grammar_weight, 1)
+
+    def calculate_overall_ats_scores(self, components: np.ndarray,
+                                     weights: Optional[Dict[str, float]] = None,
+                                     grammar_weight: Optional[float] = None) -> np.ndarray:
+        """Vectorized overall ATS score for a matrix of component scores.
+
+        ``components`` has one row per candidate and the columns semantic, keyword,
+        skills, experience and grammar, as stored by the feature store.
+        """
+        weights = weights or self.score_weights
+        if grammar_weight is None:
+            grammar_weight = self.grammar_weight
+        
+        weight_vector = np.array([
+            100 * weights['semantic'],
+            weights['keyword'],
+            weights['skills'],
+            weights['experience']
+        ])
+        overall = np.minimum(np.round(components[:, :4] @ weight_vector, 1), 100.0)
+        return np.round(overall * (1 - grammar_weight) + components[:, 4] * grammar_weight, 1)
+
     def generate_improvement_tips(self, missing_keywords: List[str], 
                                    semantic_score: float,
                                    keyword_score: float,
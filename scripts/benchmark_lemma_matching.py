@@ -0,0 +1,68 @@
+"""Measure the per-document cost of lemma-aware keyword matching.
+
+Usage: python -m scripts.benchmark_lemma_matching [--docs 200] [--batch-size 32] [--n-process 1]
+"""
+import argparse
+import random
+import time
+
+from app.services.ml_service import ml_service
+
+JOB_DESCRIPTION = (
+    "We are hiring a senior software engineer to design and deploy microservices on "
+    "Kubernetes clusters. Experience with Python, PostgreSQL, Docker and CI/CD pipelines "
+    "is required. You will lead code reviews and mentor junior developers."
+)
+
+SENTENCES = [
+    "Deployed Kubernetes clusters and automated releases with GitHub Actions.",
+    "Developed REST APIs in Python and Go backed by PostgreSQL databases.",
+    "Leading a team of engineers building distributed systems for payments.",
+    "Designed data pipelines with Spark, Kafka and Airflow for analytics.",
+    "Mentored junior developers and improved unit testing coverage by 30%.",
+    "Optimizing React frontends and migrating services to Docker containers.",
+    "Collaborated with product managers on agile roadmaps and scrum ceremonies.",
+]
+
+
+def make_resumes(count: int, sentences_per_resume: int = 25):
+    rng = random.Random(0)
+    return [" ".join(rng.choices(SENTENCES, k=sentences_per_resume)) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--n-process", type=int, default=1)
+    args = parser.parse_args()
+
+    ml_service.load_nlp()
+    resumes = make_resumes(args.docs)
+
+    start = time.perf_counter()
+    for resume in resumes:
+        ml_service.extract_keywords(resume)
+        ml_service.calculate_experience_relevance_score(JOB_DESCRIPTION, resume)
+    surface_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    lemmas = ml_service.lemmatize_texts(
+        [JOB_DESCRIPTION] + resumes, batch_size=args.batch_size, n_process=args.n_process
+    )
+    jd_lemmas, resume_lemmas = lemmas[0], lemmas[1:]
+    for resume, resume_lemma in zip(resumes, resume_lemmas):
+        ml_service.extract_keywords(resume, resume_lemma)
+        ml_service.calculate_experience_relevance_score(JOB_DESCRIPTION, resume, jd_lemmas, resume_lemma)
+    lemma_time = time.perf_counter() - start
+
+    per_doc_surface = surface_time / args.docs * 1000
+    per_doc_lemma = lemma_time / args.docs * 1000
+    print(f"documents:            {args.docs}")
+    print(f"surface matching:     {per_doc_surface:.2f} ms/doc")
+    print(f"lemma-aware matching: {per_doc_lemma:.2f} ms/doc")
+    print(f"added cost:           {per_doc_lemma - per_doc_surface:.2f} ms/doc")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from app.services.feature_store import FeatureStore
+from app.services.ml_service import MLService
+
+
+def make_scores(semantic=0.5, keyword=50.0, skills=40.0, experience=70.0, grammar=90.0):
+    return {
+        "semantic": semantic,
+        "keyword": keyword,
+        "skills": skills,
+        "experience": experience,
+        "grammar": grammar
+    }
+
+
+def test_upsert_replaces_existing_row():
+    store = FeatureStore()
+    store.upsert("alice", "job-1", make_scores(keyword=10.0), ["python"], ["go"])
+    store.upsert("alice", "job-1", make_scores(keyword=90.0), ["python", "go"], [])
+
+    assert len(store) == 1
+    columns = store.snapshot()
+    assert columns["scores"][0, 1] == 90.0
+    assert columns["detected_keywords"][0] == ["python", "go"]
+    assert columns["missing_keywords"][0] == []
+
+
+def test_flush_and_load_round_trip(tmp_path):
+    path = str(tmp_path / "store" / "features.npz")
+    store = FeatureStore(path, initial_capacity=2)
+    for i in range(5):
+        store.upsert(f"c{i}", "job-1", make_scores(skills=float(i)), [f"skill{i}"], ["ci cd", "go"])
+    store.flush()
+
+    loaded = FeatureStore(path)
+    loaded.load()
+    original, restored = store.snapshot(), loaded.snapshot()
+
+    assert len(loaded) == 5
+    np.testing.assert_array_equal(restored["scores"], original["scores"])
+    assert list(restored["candidate_ids"]) == [f"c{i}" for i in range(5)]
+    assert list(restored["detected_keywords"]) == [[f"skill{i}"] for i in range(5)]
+    assert all(missing == ["ci cd", "go"] for missing in restored["missing_keywords"])
+
+    # Loaded rows are indexed, so an upsert still replaces rather than appends
+    loaded.upsert("c0", "job-1", make_scores(), [], [])
+    assert len(loaded) == 5
+
+
+def test_snapshot_filters_by_job_id():
+    store = FeatureStore()
+    store.upsert("alice", "job-1", make_scores(), [], [])
+    store.upsert("bob", "job-2", make_scores(), [], [])
+    store.upsert("carol", "job-1", make_scores(), [], [])
+
+    columns = store.snapshot("job-1")
+    assert list(columns["candidate_ids"]) == ["alice", "carol"]
+    assert len(store.snapshot("job-3")["scores"]) == 0
+
+
+def test_autoflush_rejects_non_positive_interval(tmp_path):
+    store = FeatureStore(str(tmp_path / "features.npz"))
+    with pytest.raises(ValueError):
+        store.start_autoflush(0)
+
+
+def test_vectorized_overall_scores_match_scalar_scores():
+    service = MLService()
+    rng = np.random.default_rng(0)
+    components = np.column_stack([
+        rng.uniform(0, 1, 50),
+        rng.uniform(0, 100, 50),
+        rng.uniform(0, 100, 50),
+        rng.uniform(0, 100, 50),
+        rng.uniform(0, 100, 50),
+    ])
+
+    vectorized = service.calculate_overall_ats_scores(components)
+    scalar = [
+        service.apply_grammar_weight(
+            service.calculate_overall_ats_score(*row[:4]), row[4]
+        )
+        for row in components
+    ]
+    np.testing.assert_allclose(vectorized, scalar)
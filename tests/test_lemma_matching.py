@@ -0,0 +1,62 @@
+import pytest
+
+spacy = pytest.importorskip("spacy")
+
+from app.services.ml_service import MLService
+
+
+@pytest.fixture(scope="module")
+def service():
+    if not spacy.util.is_package("en_core_web_sm"):
+        pytest.skip("en_core_web_sm is not installed")
+    service = MLService()
+    service.load_nlp()
+    return service
+
+
+def lemma_features(service, *texts):
+    lemmas = service.lemmatize_texts(list(texts))
+    return [service.extract_text_features(text, lemma) for text, lemma in zip(texts, lemmas)]
+
+
+def test_pipeline_excludes_parser_and_ner(service):
+    assert "parser" not in service.nlp.pipe_names
+    assert "ner" not in service.nlp.pipe_names
+    assert "lemmatizer" in service.nlp.pipe_names
+
+
+def test_inflected_action_verb_matches(service):
+    jd = "Senior engineer needed."
+    resume = "Senior engineer deploying Kubernetes clusters."
+    jd_features, resume_features = lemma_features(service, jd, resume)
+
+    surface = service.calculate_experience_relevance_scores(
+        service.extract_text_features(jd), [service.extract_text_features(resume)]
+    )[0]
+    lemma = service.calculate_experience_relevance_scores(jd_features, [resume_features])[0]
+    # "deploying" matches the action verb "deployed" only through its lemma
+    assert surface == 80.0
+    assert lemma == 82.0
+
+
+def test_plural_skill_matches(service):
+    text = "Designed a microservice for billing."
+    (features,) = lemma_features(service, text)
+
+    assert "microservices" not in service.extract_keywords(text)
+    assert "microservices" in service.extract_keywords(text, features=features)
+
+
+def test_went_does_not_match_go(service):
+    text = "We went to production early."
+    (features,) = lemma_features(service, text)
+
+    assert "go" not in service.extract_keywords(text, features=features)
+
+
+def test_led_does_not_match_lead_level(service):
+    jd_features, resume_features = lemma_features(service, "Team lead wanted.", "Led a small team.")
+
+    score = service.calculate_experience_relevance_scores(jd_features, [resume_features])[0]
+    # "lead" is the only JD experience keyword and is unmatched; "led" still counts as an action verb
+    assert score == 2.0
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from app.services.ml_service import MLService
+
+
+@pytest.fixture
+def service():
+    return MLService()
+
+
+def test_symbol_skills_are_matched(service):
+    keywords = service.extract_keywords("Built services in C++ and C# with CI/CD.")
+    assert keywords["c++"] == 1
+    assert keywords["c#"] == 1
+    assert "continuous integration" in keywords
+
+
+def test_dotted_skills_are_kept_whole(service):
+    keywords = service.extract_keywords("Frontend in Vue.js and Next.js, APIs in Node.js.")
+    assert {"vue.js", "next.js", "node.js"} <= set(keywords)
+
+
+def test_dot_joined_words_are_split(service):
+    assert "docker" in service.extract_keywords("Led AWS.Docker migration")
+    keywords = service.extract_keywords("AWS/GCP.Kubernetes")
+    assert "kubernetes" in keywords
+    assert "google cloud platform" in keywords
+
+
+def test_experience_keywords_match_whole_words_only(service):
+    jd = "Looking for a lead or head of engineering."
+    resume = "Leadership training at company headquarters."
+    # Neither "lead" nor "head" occurs as a word, and there are no action verbs
+    assert service.calculate_experience_relevance_score(jd, resume) == 0.0
+
+
+def test_experience_keywords_match_plurals(service):
+    score = service.calculate_experience_relevance_score(
+        "Senior engineer needed.", "Mentored senior engineers."
+    )
+    assert score == 80.0
+
+
+def test_neutral_score_without_experience_keywords(service):
+    assert service.calculate_experience_relevance_score("Python and SQL.", "Python.") == 70.0
+
+
+def test_batch_scores_match_single_scores(service):
+    jd = "Senior software engineer to lead a team of developers."
+    resumes = [
+        "Senior engineer. Developed and deployed services.",
+        "Junior analyst who created dashboards.",
+        "Led developers as team lead; designed, built and launched products.",
+    ]
+    jd_features = service.extract_text_features(jd)
+    batch = service.calculate_experience_relevance_scores(
+        jd_features, [service.extract_text_features(r) for r in resumes]
+    )
+    single = [service.calculate_experience_relevance_score(jd, r) for r in resumes]
+    np.testing.assert_allclose(batch, single)
@@ -0,0 +1,80 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+from app.core.config import settings
+from app.services.feature_store import FeatureStore
+
+RESCORE_URL = f"{settings.API_V1_STR}/rescore"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    store = FeatureStore()
+    rows = [
+        # candidate, job, semantic, keyword, skills, experience, grammar
+        ("alice", "job-1", 0.9, 20.0, 30.0, 40.0, 100.0),
+        ("bob", "job-1", 0.2, 90.0, 60.0, 50.0, 100.0),
+        ("carol", "job-1", 0.5, 50.0, 95.0, 70.0, 100.0),
+        ("dave", "job-2", 1.0, 100.0, 100.0, 100.0, 100.0),
+    ]
+    for candidate_id, job_id, semantic, keyword, skills, experience, grammar in rows:
+        store.upsert(
+            candidate_id,
+            job_id,
+            {
+                "semantic": semantic,
+                "keyword": keyword,
+                "skills": skills,
+                "experience": experience,
+                "grammar": grammar
+            },
+            detected_keywords=[],
+            missing_keywords=[]
+        )
+    monkeypatch.setattr(main, "feature_store", store)
+    # Not used as a context manager, so the lifespan (model loading) does not run
+    return TestClient(main.app)
+
+
+def ranked_ids(response):
+    return [candidate["candidate_id"] for candidate in response.json()["candidates"]]
+
+
+def test_rescore_ranks_by_new_weights(client):
+    weights = {"semantic": 0, "keyword": 1, "skills": 0, "experience": 0, "grammar": 0}
+    response = client.post(RESCORE_URL, json={"job_id": "job-1", "weights": weights})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["total_candidates"] == 3
+    assert ranked_ids(response) == ["bob", "carol", "alice"]
+    assert [c["rank"] for c in body["candidates"]] == [1, 2, 3]
+    assert body["candidates"][0]["overall_ats_score"] == 90.0
+
+
+def test_rescore_normalizes_component_weights(client):
+    weights = {"semantic": 0, "keyword": 3, "skills": 3, "experience": 0, "grammar": 0}
+    response = client.post(RESCORE_URL, json={"job_id": "job-1", "weights": weights})
+
+    scores = {c["candidate_id"]: c["overall_ats_score"] for c in response.json()["candidates"]}
+    assert scores == {"alice": 25.0, "bob": 75.0, "carol": 72.5}
+
+
+def test_rescore_honors_top_k(client):
+    weights = {"semantic": 0, "keyword": 0, "skills": 1, "experience": 0, "grammar": 0}
+    response = client.post(RESCORE_URL, json={"job_id": "job-1", "weights": weights, "top_k": 2})
+
+    assert response.json()["total_candidates"] == 3
+    assert ranked_ids(response) == ["carol", "bob"]
+
+
+def test_rescore_rejects_all_zero_component_weights(client):
+    weights = {"semantic": 0, "keyword": 0, "skills": 0, "experience": 0, "grammar": 0.5}
+    response = client.post(RESCORE_URL, json={"job_id": "job-1", "weights": weights})
+
+    assert response.status_code == 400
+
+
+def test_rescore_requires_job_id(client):
+    assert client.post(RESCORE_URL, json={}).status_code == 422